@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Requests sent by bots streaming progress with and without `BotoCoalescer`,
+talking to a local stand-in of the Telegram server.
+
+Run with `PYTHONPATH=. python benchmarks/coalescing.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from typing import Optional
+
+from aiohttp import web
+
+import botodesu
+import asyncio
+import collections
+import time
+
+_CHAT_NUM = 20
+_STEP_NUM = 100
+_STEP_INTERVAL = 0.01
+
+
+class _StandIn:
+    """
+    Counts the requests of each method.
+    """
+    def __init__(self) -> None:
+        self.requests = collections.Counter()  # type: collections.Counter
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests[request.match_info["method"]] += 1
+
+        return web.json_response({"ok": True, "result": {"message_id": 1}})
+
+
+async def _stream_progress(boto: botodesu.Boto, chat_id: int) -> None:
+    for step in range(_STEP_NUM):
+        asyncio.ensure_future(boto.edit_message_text(
+            chat_id=chat_id, message_id=1,
+            text="Progress: {}%".format(step)))
+
+        if step % 10 == 0:
+            asyncio.ensure_future(boto.send_message(
+                chat_id=chat_id, text="Step {} finished.".format(step)))
+
+        await asyncio.sleep(_STEP_INTERVAL)
+
+
+async def _bench(
+    base_url: str, stand_in: _StandIn,
+        coalescer: Optional[botodesu.BotoCoalescer]) -> None:
+    stand_in.requests.clear()
+
+    start = time.perf_counter()
+
+    async with botodesu.Boto(
+            "TOKEN", base_url=base_url, coalescer=coalescer) as boto:
+        await asyncio.gather(*(
+            _stream_progress(boto, chat_id)
+            for chat_id in range(_CHAT_NUM)))
+        await asyncio.sleep(0.5)
+
+    print("{}: {} in {:.2f} s".format(
+        "with coalescer" if coalescer else "without coalescer",
+        ", ".join(
+            "{} {}".format(count, method)
+            for method, count in sorted(stand_in.requests.items())),
+        time.perf_counter() - start))
+
+
+async def main() -> None:
+    stand_in = _StandIn()
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", stand_in.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    base_url = "http://127.0.0.1:{}/bot{{token}}/{{method}}".format(
+        runner.addresses[0][1])
+
+    try:
+        await _bench(base_url, stand_in, None)
+        await _bench(
+            base_url, stand_in,
+            botodesu.BotoCoalescer(window=0.2, merge_messages=True))
+
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    botodesu.run(main)
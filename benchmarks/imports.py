@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Startup time of `import botodesu` measured with `python -X importtime`.
+
+Exits with a non-zero status if the median exceeds the budget(in
+milliseconds, default to 50) given as the first argument, or any of the
+heavy modules is imported by `import botodesu`.
+"""
+
+from typing import List, Tuple, Set
+
+import statistics
+import subprocess
+import sys
+import os
+
+_RUNS = 15
+
+_HEAVY_MODULES = ("aiohttp", "mimetypes", "sqlite3", "random", "traceback")
+
+_SCRIPTS = {
+    "import botodesu": "import botodesu",
+    "botodesu.Boto": "import botodesu; botodesu.Boto",
+}
+
+_CHECK_SCRIPT = (
+    "import sys, botodesu; "
+    "print(' '.join(name for name in {!r} if name in sys.modules))").format(
+        _HEAVY_MODULES)
+
+
+def _run(script: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [path for path in [env.get("PYTHONPATH")] if path])
+
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script], env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+
+
+def _parse(script: str) -> List[Tuple[str, int]]:
+    """
+    Return the name and cumulative import time(in microseconds) of the
+    modules imported at the top level.
+    """
+    results = []
+
+    # import time: self [us] | cumulative | imported package
+    for line in _run(script).stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _, cumulative, name = line.split("|")
+
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            results.append((name.strip(), int(cumulative)))
+
+    return results
+
+
+def _measure(script: str, startup_modules: Set[str]) -> float:
+    """
+    Return the import time of the script in milliseconds, excluding the
+    modules imported during the interpreter startup.
+    """
+    return sum(
+        cumulative for name, cumulative in _parse(script)
+        if name not in startup_modules) / 1000
+
+
+def main() -> int:
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    startup_modules = {name for name, _ in _parse("pass")}
+
+    for name, script in _SCRIPTS.items():
+        results = [_measure(script, startup_modules) for _ in range(_RUNS)]
+
+        print("{}: {:.1f} ms (median of {})".format(
+            name, statistics.median(results), _RUNS))
+
+        if name == "import botodesu":
+            import_time = statistics.median(results)
+
+    heavy_modules = _run(_CHECK_SCRIPT).stdout.split()
+
+    if heavy_modules:
+        print("Imported by `import botodesu`: {}.".format(
+            ", ".join(heavy_modules)))
+
+        return 1
+
+    if import_time > budget:
+        print("Over the budget of {:.1f} ms.".format(budget))
+
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Work done by `InlineQueryHelper` on keystroke bursts compared to answering
+every inline query directly.
+
+Run with `PYTHONPATH=. python benchmarks/inline.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from typing import Any, List
+
+from botodesu import body
+
+import botodesu
+import asyncio
+import time
+
+_USER_NUM = 200
+_WORDS = ("botodesu", "telegram", "python", "asyncio")
+_KEYSTROKE_INTERVAL = 0.05
+
+
+class _Counter:
+    def __init__(self) -> None:
+        self.computations = 0
+        self.answers = 0
+
+
+class _FakeBoto:
+    """
+    Serializes the request body like `Boto` without sending it.
+    """
+    def __init__(self, counter: _Counter) -> None:
+        self._counter = counter
+
+    async def answer_inline_query(self, **kwargs: Any) -> None:
+        body.generate(**kwargs)
+        self._counter.answers += 1
+
+
+def _make_results_func(counter: _Counter) -> Any:
+    async def get_results(
+            query: str, inline_query: botodesu.BotoDikuto) -> List[Any]:
+        counter.computations += 1
+
+        return [{
+            "type": "article", "id": str(i),
+            "title": "{} #{}".format(query, i),
+            "input_message_content": {"message_text": query * 10}}
+            for i in range(50)]
+
+    return get_results
+
+
+async def _type(handle: Any, user_id: int, word: str) -> None:
+    # Every user types a word, one inline query per keystroke.
+    for i in range(1, len(word) + 1):
+        update = botodesu.BotoDikuto(
+            update_id=i, inline_query=botodesu.BotoDikuto(
+                id="{}-{}".format(user_id, i), query=word[:i],
+                **{"from": botodesu.BotoDikuto(id=user_id)}))
+
+        asyncio.ensure_future(handle(update))
+
+        await asyncio.sleep(_KEYSTROKE_INTERVAL)
+
+
+async def _bench(name: str, handle_factory: Any) -> None:
+    counter = _Counter()
+    handle = handle_factory(counter)
+
+    start = time.process_time()
+
+    await asyncio.gather(*(
+        _type(handle, user_id, _WORDS[user_id % len(_WORDS)])
+        for user_id in range(_USER_NUM)))
+    await asyncio.sleep(1)  # Wait for the debounced inline queries.
+
+    print("{}: {} computations, {} answers, {:.3f} s cpu".format(
+        name, counter.computations, counter.answers,
+        time.process_time() - start))
+
+
+def _direct(counter: _Counter) -> Any:
+    get_results = _make_results_func(counter)
+    boto = _FakeBoto(counter)
+
+    async def handle(update: botodesu.BotoDikuto) -> None:
+        inline_query = update.inline_query
+
+        await boto.answer_inline_query(
+            inline_query_id=inline_query.id,
+            results=await get_results(inline_query.query, inline_query))
+
+    return handle
+
+
+def _helper(counter: _Counter) -> Any:
+    helper = botodesu.InlineQueryHelper(_make_results_func(counter))
+    boto = _FakeBoto(counter)
+
+    async def handle(update: botodesu.BotoDikuto) -> None:
+        await helper.handle(boto, update)
+
+    return handle
+
+
+async def main() -> None:
+    await _bench("direct", _direct)
+    await _bench("InlineQueryHelper", _helper)
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
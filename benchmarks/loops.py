@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Throughput of an echo bot on asyncio and uvloop event loops, talking to a
+local stand-in of the Telegram server.
+
+Run with `PYTHONPATH=. python benchmarks/loops.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from aiohttp import web
+
+import botodesu
+import asyncio
+import time
+
+_UPDATE_NUM = 5000
+
+
+class _StandIn:
+    """
+    Serves `getUpdates` from a fixed number of updates, and counts the
+    `sendMessage` requests.
+    """
+    def __init__(self) -> None:
+        self._next_update_id = 1
+        self._sent = 0
+        self.finished = asyncio.Event()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        kwargs = await request.json()
+
+        if method == "getupdates":
+            offset = max(kwargs.get("offset", 0), 1)
+            limit = int(kwargs.get("limit", 100))
+
+            end = min(offset + limit, _UPDATE_NUM + 1)
+
+            if offset >= end and kwargs.get("timeout"):
+                await self.finished.wait()  # Long polling.
+
+            result = [{
+                "update_id": i,
+                "message": {
+                    "message_id": i, "chat": {"id": i % 100},
+                    "text": "Hello, {}!".format(i)}}
+                for i in range(offset, end)]
+
+        elif method == "sendmessage":
+            self._sent += 1
+
+            if self._sent == _UPDATE_NUM:
+                self.finished.set()
+
+            result = {"message_id": self._sent}
+
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+
+async def _echo(boto: botodesu.Boto, update: botodesu.BotoDikuto) -> None:
+    await boto.send_message(
+        chat_id=update.message.chat.id,
+        text="You said: \"{}\".".format(update.message.text))
+
+
+async def main() -> float:
+    stand_in = _StandIn()
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", stand_in.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    base_url = "http://127.0.0.1:{}/bot{{token}}/{{method}}".format(
+        runner.addresses[0][1])
+
+    ruta = botodesu.BotoRuta()
+    ruta.add_handler(_echo)
+
+    try:
+        async with botodesu.Boto("TOKEN", base_url=base_url) as boto:
+            start = time.perf_counter()
+
+            fur = asyncio.ensure_future(ruta.run(boto))
+            await stand_in.finished.wait()
+
+            elapsed = time.perf_counter() - start
+
+            fur.cancel()
+            await asyncio.wait([fur])
+
+    finally:
+        await runner.cleanup()
+
+    return elapsed
+
+
+if __name__ == "__main__":
+    for loop in ("asyncio", "uvloop"):
+        elapsed = botodesu.run(main, loop=loop)
+
+        print("{}: {:.0f} updates/s".format(loop, _UPDATE_NUM / elapsed))
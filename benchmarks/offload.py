@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Event loop lag caused by CPU-bound handlers and by decoding large responses,
+with and without offloading them to executors.
+
+Run with `PYTHONPATH=. python benchmarks/offload.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from typing import Any, Optional, List
+
+from aiohttp import web
+
+import botodesu
+import asyncio
+import concurrent.futures
+import statistics
+import json
+import time
+import zlib
+import os
+
+_TICK = 0.005
+_UPDATE_NUM = 16
+
+_PAYLOAD = os.urandom(1024 * 1024) * 4
+
+# A getUpdates batch of about 16MB.
+_LARGE_RESPONSE = json.dumps({"ok": True, "result": [{
+    "update_id": i,
+    "message": {"message_id": i, "chat": {"id": i}, "text": "x" * 1000}}
+    for i in range(15000)]})
+
+
+class _LagMonitor:
+    """
+    Measures how late a periodic timer fires.
+    """
+    def __init__(self) -> None:
+        self._lags = []  # type: List[float]
+        self._fur = None  # type: Optional[asyncio.Future]
+
+    async def _tick(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(_TICK)
+
+            self._lags.append(time.perf_counter() - start - _TICK)
+
+    def __enter__(self) -> "_LagMonitor":
+        self._fur = asyncio.ensure_future(self._tick())
+
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._fur.cancel()
+
+    def __str__(self) -> str:
+        return "mean lag {:.1f} ms, max lag {:.1f} ms".format(
+            statistics.mean(self._lags) * 1000, max(self._lags) * 1000)
+
+
+def _compress(update: botodesu.BotoDikuto) -> None:
+    # Stands for image resizing before `send_photo`.
+    zlib.compress(_PAYLOAD, 9)
+
+
+async def _bench_handlers(
+        boto: botodesu.Boto, name: str, **kwargs: Any) -> None:
+    ruta = botodesu.BotoRuta()
+
+    if kwargs:
+        ruta.add_handler(_compress, **kwargs)
+
+    else:
+        async def handler(
+                boto: botodesu.Boto, update: botodesu.BotoDikuto) -> None:
+            _compress(update)
+
+        ruta.add_handler(handler)
+
+    updates = [
+        botodesu.BotoDikuto(update_id=i, message=botodesu.BotoDikuto(
+            chat=botodesu.BotoDikuto(id=i), text="photo"))
+        for i in range(_UPDATE_NUM)]
+
+    with _LagMonitor() as monitor:
+        start = time.perf_counter()
+
+        await asyncio.gather(*(
+            ruta.dispatch(boto, update) for update in updates))
+
+        elapsed = time.perf_counter() - start
+
+        await asyncio.sleep(_TICK * 2)
+
+    print("handlers, {}: {:.2f} s, {}".format(name, elapsed, monitor))
+
+
+async def _bench_decode(base_url: str, name: str, **kwargs: Any) -> None:
+    async with botodesu.Boto(
+            "TOKEN", base_url=base_url, **kwargs) as boto:
+        with _LagMonitor() as monitor:
+            start = time.perf_counter()
+
+            for _ in range(5):
+                await boto.get_updates()
+
+            elapsed = time.perf_counter() - start
+
+    print("decoding, {}: {:.2f} s, {}".format(name, elapsed, monitor))
+
+
+async def main() -> None:
+    process_executor = concurrent.futures.ProcessPoolExecutor()
+
+    async with botodesu.Boto("TOKEN") as boto:
+        await _bench_handlers(boto, "on the loop")
+        await _bench_handlers(boto, "thread pool", offload=True)
+        await _bench_handlers(
+            boto, "process pool", offload=process_executor)
+
+    process_executor.shutdown()
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(
+            text=_LARGE_RESPONSE, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    base_url = "http://127.0.0.1:{}/bot{{token}}/{{method}}".format(
+        runner.addresses[0][1])
+
+    try:
+        await _bench_decode(base_url, "on the loop")
+        await _bench_decode(
+            base_url, "thread pool", decode_threshold=1024 * 1024)
+
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    botodesu.run(main)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Overhead of `BotoProfiler`.
+
+- dispatch: dispatching updates through `BotoRuta` to a handler.
+- API wrapper: `profile_api` around an API call, which applies to every API
+  call made by a profiled handler.
+- background: pure Python code running while the lag timer and the watchdog
+  thread are active, which costs the same regardless of `sample_rate`.
+
+Times are measured as the CPU time of the process, which includes the
+watchdog thread. The configurations are run interleaved for several rounds
+after a warm-up round. The medians are reported with the interquartile
+range, differences smaller than the range are within the noise.
+
+Run with `PYTHONPATH=. python benchmarks/profiling.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from typing import Any, Optional, Dict, List, Callable, Awaitable
+
+import botodesu
+import asyncio
+import collections
+import gc
+import statistics
+import time
+
+_ROUNDS = 15
+
+_DISPATCH_NUM = 50000
+_API_CALL_NUM = 50000
+_SPIN_NUM = 3000000
+
+
+async def _handler(boto: botodesu.Boto, update: botodesu.BotoDikuto) -> None:
+    await asyncio.sleep(0)
+
+
+async def _api_call() -> None:
+    await asyncio.sleep(0)
+
+
+async def _bench_dispatch(
+        profiler: Optional[botodesu.BotoProfiler]) -> float:
+    ruta = botodesu.BotoRuta()
+    ruta.add_handler(_handler)
+
+    update = botodesu.BotoDikuto(
+        update_id=1, message=botodesu.BotoDikuto(text="Hello!"))
+
+    async with botodesu.Boto("TOKEN", profiler=profiler) as boto:
+        start = time.process_time()
+
+        for _ in range(_DISPATCH_NUM):
+            await ruta.dispatch(boto, update)
+
+        return (time.process_time() - start) / _DISPATCH_NUM
+
+
+async def _bench_api(profiler: Optional[botodesu.BotoProfiler]) -> float:
+    start = time.process_time()
+
+    for _ in range(_API_CALL_NUM):
+        if profiler is None:
+            await _api_call()
+
+        else:
+            await profiler.profile_api("get_me", _api_call())
+
+    return (time.process_time() - start) / _API_CALL_NUM
+
+
+async def _bench_background(
+        profiler: Optional[botodesu.BotoProfiler]) -> float:
+    if profiler is not None:
+        profiler.start(asyncio.get_event_loop())
+
+    try:
+        start = time.process_time()
+
+        # Yield to the event loop from time to time to let the lag timer run.
+        for _ in range(_SPIN_NUM // 10000):
+            for i in range(10000):
+                pass
+
+            await asyncio.sleep(0)
+
+        return (time.process_time() - start) / _SPIN_NUM
+
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+
+_BENCHES = collections.OrderedDict([
+    ("dispatch", (_bench_dispatch, [
+        None, {"sample_rate": 0.0}, {"sample_rate": 0.01},
+        {"sample_rate": 0.1}, {"sample_rate": 1.0}])),
+    ("API wrapper", (_bench_api, [None, {"sample_rate": 1.0}])),
+    ("background", (_bench_background, [
+        None, {"stack_interval": 0.01}, {"stack_interval": 0.1}])),
+])  # type: Dict[str, Any]
+
+
+def _describe(kwargs: Optional[Dict[str, Any]]) -> str:
+    if kwargs is None:
+        return "without profiler"
+
+    return ", ".join("{}={}".format(name, value)
+                     for name, value in kwargs.items())
+
+
+async def _run_round(
+        bench: Callable[..., Awaitable[float]],
+        all_kwargs: List[Optional[Dict[str, Any]]],
+        round_num: int) -> List[float]:
+    # Rotate the order every round so no configuration is always first.
+    order = list(range(len(all_kwargs)))
+    order = order[round_num % len(order):] + order[:round_num % len(order)]
+
+    results = [0.0] * len(all_kwargs)
+
+    for i in order:
+        kwargs = all_kwargs[i]
+        profiler = None if kwargs is None else \
+            botodesu.BotoProfiler(**kwargs)
+
+        # Keep the garbage of the previous runs out of the measurement.
+        gc.collect()
+        gc.disable()
+
+        try:
+            results[i] = await bench(profiler)
+
+        finally:
+            gc.enable()
+
+    return results
+
+
+async def main() -> None:
+    for name, (bench, all_kwargs) in _BENCHES.items():
+        await _run_round(bench, all_kwargs, 0)  # Warm up.
+
+        rounds = []
+
+        for round_num in range(_ROUNDS):
+            rounds.append(await _run_round(bench, all_kwargs, round_num))
+
+        all_results = [
+            sorted(results[i] for results in rounds)
+            for i in range(len(all_kwargs))]
+        medians = [statistics.median(results) for results in all_results]
+
+        print("{} (median of {} rounds):".format(name, _ROUNDS))
+
+        for kwargs, results, median in zip(
+                all_kwargs, all_results, medians):
+            iqr = results[len(results) * 3 // 4] - results[len(results) // 4]
+
+            print(
+                "  {}: {:.3f} us(IQR {:.3f} us), {:+.3f} us({:+.1f}%)".format(
+                    _describe(kwargs), median * 1e6, iqr * 1e6,
+                    (median - medians[0]) * 1e6,
+                    (median / medians[0] - 1) * 100))
+
+if __name__ == "__main__":
+    botodesu.run(main)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Per-update dispatch time of `BotoRuta` with a growing number of handlers.
+
+Run with `PYTHONPATH=. python benchmarks/routing.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+from typing import Dict
+
+import botodesu
+import asyncio
+import time
+
+_ROUNDS = 10000
+
+
+async def _handler(boto: None, update: botodesu.BotoDikuto) -> None:
+    pass
+
+
+def _make_ruta(handler_num: int) -> botodesu.BotoRuta:
+    ruta = botodesu.BotoRuta()
+
+    # A quarter of each kind: commands, exact texts, regexes and callback
+    # queries matched by predicates.
+    for i in range(handler_num):
+        kind = i % 4
+
+        if kind == 0:
+            ruta.add_handler(_handler, command="command{}".format(i))
+
+        elif kind == 1:
+            ruta.add_handler(_handler, text="text{}".format(i))
+
+        elif kind == 2:
+            ruta.add_handler(_handler, regex=r"^regex{}\b".format(i))
+
+        else:
+            ruta.add_handler(
+                _handler, "callback_query",
+                predicate=lambda update, i=i: update.callback_query.data ==
+                "data{}".format(i))
+
+    return ruta
+
+
+def _make_updates(handler_num: int) -> Dict[str, botodesu.BotoDikuto]:
+    def message(text: str) -> botodesu.BotoDikuto:
+        return botodesu.BotoDikuto(
+            update_id=1, message=botodesu.BotoDikuto(
+                message_id=1, chat=botodesu.BotoDikuto(id=1), text=text))
+
+    last = handler_num - handler_num % 4 - 4
+
+    # The last registered handler of each kind is the worst case.
+    return {
+        "command": message("/command{}@botodesu_bot".format(last)),
+        "text": message("text{}".format(last + 1)),
+        "regex": message("regex{} arguments".format(last + 2)),
+        "unmatched": message("unmatched text")}
+
+
+async def _bench(
+        ruta: botodesu.BotoRuta, update: botodesu.BotoDikuto) -> float:
+    start = time.perf_counter()
+
+    for _ in range(_ROUNDS):
+        await ruta.dispatch(None, update)
+
+    return (time.perf_counter() - start) / _ROUNDS
+
+
+async def main() -> None:
+    for handler_num in (8, 100, 500):
+        ruta = _make_ruta(handler_num)
+        results = []
+
+        for kind, update in _make_updates(handler_num).items():
+            per_update = await _bench(ruta, update)
+            results.append("{}: {:.2f} us".format(kind, per_update * 1e6))
+
+        print("{:>4} handlers: {}".format(handler_num, ", ".join(results)))
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Memory used by 1M idle sessions in `MemorySessionStore`.
+
+Run with `PYTHONPATH=. python benchmarks/sessions.py` from the root of the
+repository, see `benchmarks/README.rst`.
+"""
+
+import botodesu
+import asyncio
+import tracemalloc
+import time
+
+_SESSION_NUM = 1000000
+
+
+async def _fill(store: botodesu.MemorySessionStore) -> None:
+    for i in range(_SESSION_NUM):
+        await store.save(
+            "{}:{}".format(i, i), botodesu.BotoDikuto(state="idle"))
+
+
+async def main() -> None:
+    tracemalloc.start()
+
+    for kwargs in ({}, {"ttl": 3600}, {"max_size": _SESSION_NUM, "ttl": 3600}):
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+
+        store = botodesu.MemorySessionStore(**kwargs)
+        await _fill(store)
+
+        elapsed = time.perf_counter() - start
+        used = tracemalloc.get_traced_memory()[0] - before
+
+        print("{}: {:.1f} MiB, {:.0f} bytes/session, {:.2f} us/save".format(
+            kwargs or "unlimited", used / 1024 / 1024, used / _SESSION_NUM,
+            elapsed / _SESSION_NUM * 1e6))
+
+        del store
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
@@ -25,21 +25,22 @@
 Request Body Generation.
 """
 
-from typing import Union, Any, Tuple, AnyStr, Dict
+from typing import Union, Any, Tuple, AnyStr, Dict, Optional
 
 import aiohttp
 import mimetypes
 import json
 
-__all__ = ["BotoFairu"]
+__all__ = ["BotoFairu", "BotoJeison"]
 
 
 class BotoFairu:
     """
     Helper class for file uploading.
 
-    The content type will be guessd by `mimetypes` depending on the file name.
-    The default content transfer encoding is binary.
+    The content type will be guessd by `mimetypes` depending on the file name
+    when the file is being sent. The default content transfer encoding is
+    binary.
 
     These options can be overriden by using the methods below.
     """
@@ -47,14 +48,29 @@ class BotoFairu:
         self._filename = filename
         self._content = content
 
-        self._content_type = mimetypes.guess_type(self._filename)[0]
+        # Guessing initializes the mime types database, which is deferred
+        # until the file is actually sent.
+        self._content_type = None  # type: Optional[str]
+        self._content_type_guessed = False
+
         self._content_transfer_encoding = "binary"
 
+    def get_content_type(self) -> Optional[str]:
+        """
+        Return the content type, guess it if it has not been set.
+        """
+        if not self._content_type_guessed:
+            self._content_type = mimetypes.guess_type(self._filename)[0]
+            self._content_type_guessed = True
+
+        return self._content_type
+
     def set_content_type(self, content_type: str) -> None:
         """
         Override the content type guessd by `mimetypes`.
         """
         self._content_type = content_type
+        self._content_type_guessed = True
 
     def set_content_transfer_encoding(self, new_cte: str) -> None:
         """
@@ -63,6 +79,30 @@ class BotoFairu:
         self._content_transfer_encoding = new_cte
 
 
+class BotoJeison:
+    """
+    Helper class for pre-serialized json values.
+
+    The value is serialized once on creation and embedded as is into every
+    request it is sent with, which saves the cost of serializing large values
+    (e.g.: the results of inline queries) repeatedly.
+    """
+    def __init__(self, value: Any) -> None:
+        self._content = json.dumps(value)
+
+
+def _dumps(kwargs: Dict[str, Any]) -> str:
+    if not any(isinstance(value, BotoJeison) for value in kwargs.values()):
+        return json.dumps(kwargs)
+
+    return "{{{}}}".format(", ".join(
+        "{}: {}".format(
+            json.dumps(name),
+            value._content if isinstance(value, BotoJeison)
+            else json.dumps(value))
+        for name, value in kwargs.items()))
+
+
 def _generate_form_data(**kwargs: Union[Any, BotoFairu]) -> aiohttp.FormData:
     form_fata = aiohttp.FormData()
 
@@ -70,10 +110,13 @@ def _generate_form_data(**kwargs: Union[Any, BotoFairu]) -> aiohttp.FormData:
         if isinstance(value, BotoFairu):
             form_fata.add_field(
                 name, value._content,
-                content_type=value._content_type,
+                content_type=value.get_content_type(),
                 filename=value._filename,
                 content_transfer_encoding=value._content_transfer_encoding)
 
+        elif isinstance(value, BotoJeison):
+            form_fata.add_field(name, value._content)
+
         elif isinstance(value, (list, dict)):
             form_fata.add_field(name, json.dumps(value))
 
@@ -90,7 +133,7 @@ def generate(**kwargs: Any) -> Tuple[
         Dict[str, str], Union[AnyStr, aiohttp.FormData]]:
     headers = {}  # type: Dict[str, str]
     try:
-        data = json.dumps(kwargs)
+        data = _dumps(kwargs)
         headers["Content-Type"] = "application/json"
 
     except:  # Fallback to Form Data.
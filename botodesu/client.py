@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+The Bot API Client.
+"""
+
+from typing import (
+    Optional, Any, List, Callable, Union, Tuple, TYPE_CHECKING)
+
+from . import dikuto
+from . import methods
+from . import body
+
+from ._version import version
+from .dikuto import BotoDikuto
+from .exceptions import BotoEra, BotoWarning
+
+import asyncio
+import aiohttp
+import concurrent.futures
+import json
+import functools
+import warnings
+import random
+import traceback
+
+if TYPE_CHECKING:  # Only imported when a profiler or coalescer is used.
+    from . import profiling
+    from . import coalescing
+
+__all__ = ["Boto"]
+
+_DEFAULT_BASE_URL = "https://api.telegram.org/bot{token}/{method}"
+
+_USER_AGENT = "aiohttp/{} botodesu/{}".format(aiohttp.__version__, version)
+
+
+def _loads(content: Union[str, bytes]) -> BotoDikuto:
+    return json.loads(content, object_pairs_hook=BotoDikuto)
+
+
+def _make_dikuto(pairs: List[Tuple[str, Any]]) -> BotoDikuto:
+    return BotoDikuto(pairs)
+
+
+def _loads_in_executor(content: bytes) -> BotoDikuto:
+    # The json decoder holds the GIL until it finishes unless it calls back
+    # into Python code, so a Python function is used as the hook to let the
+    # event loop run between objects.
+    return json.loads(content, object_pairs_hook=_make_dikuto)
+
+
+class Boto:
+    """
+    Bo-to Desu!
+
+    This is an automatically expand class.
+
+    This class will expand its methods automatically.
+
+    After using, the caller of this class should await its `_close` method or
+    wrap it under an `async with` statement to perform automatic clean up when
+    leaving the context.
+
+    The long pulling method of getting updates is support through `async for`.
+
+    CPU-bound work can be run in the `executor`(default to the default
+    executor of the event loop) through the `offload` method. Responses
+    larger than `decode_threshold` bytes are decoded in the `executor` as
+    well, so decoding a large batch of updates does not block the event loop.
+
+    Profiling can be turned on by providing a `BotoProfiler`, and redundant
+    requests can be coalesced by providing a `BotoCoalescer`.
+
+    See the example in the documentation.
+    """
+    def __init__(
+        self, token: str, *, base_url: str=_DEFAULT_BASE_URL,
+        executor: Optional[concurrent.futures.Executor]=None,
+        decode_threshold: Optional[int]=None,
+        profiler: Optional["profiling.BotoProfiler"]=None,
+        coalescer: Optional["coalescing.BotoCoalescer"]=None,
+            loop: Optional[asyncio.AbstractEventLoop]=None) -> None:
+        self._loop = loop or asyncio.get_event_loop()
+
+        self._token = token
+        self._base_url = base_url
+
+        self._executor = executor
+        self._decode_threshold = decode_threshold
+
+        self._profiler = profiler
+        self._coalescer = coalescer
+
+        if self._profiler is not None:
+            self._profiler.start(self._loop)
+
+        self._client = aiohttp.ClientSession(loop=self._loop)
+
+        self._err_times = 0
+        self._pending_updates = []  # type: List[dikuto.BotoDikuto]
+        self._update_offset = 0
+
+    def _make_request_url(self, method_name: str) -> str:
+        return self._base_url.format(
+            token=self._token, method=methods.get_url_name(method_name))
+
+    @property
+    def profiler(self) -> Optional["profiling.BotoProfiler"]:
+        """
+        The `BotoProfiler` of the `Boto`, or `None` if it is not profiled.
+        """
+        return self._profiler
+
+    async def _send_anything(
+            self, __method_name: str, **kwargs: Any) -> Any:
+        if self._coalescer is None:
+            return await self._send_now(__method_name, **kwargs)
+
+        return await self._coalescer.send(
+            self._send_now, __method_name, kwargs)
+
+    async def _send_now(
+            self, __method_name: str, **kwargs: Any) -> Any:
+        if self._profiler is None:
+            return await self._send_request(__method_name, **kwargs)
+
+        return await self._profiler.profile_api(
+            __method_name, self._send_request(__method_name, **kwargs))
+
+    async def _send_request(
+            self, __method_name: str, **kwargs: Any) -> Any:
+        assert self._client is not None, "Boto is closed!"
+
+        url = self._make_request_url(__method_name)
+
+        # Telegram will cut off requests longer than 60 seconds,
+        # but it's better to wait the server close the connection first.
+        headers = {"User-Agent": _USER_AGENT}
+        body_headers, data = body.generate(**kwargs)
+
+        headers.update(body_headers)
+
+        async with self._client.post(
+                url, headers=headers, data=data, timeout=61) as response:
+            content_bytes = await response.read()
+
+            if self._decode_threshold is not None and \
+                    len(content_bytes) >= self._decode_threshold:
+                content = await self.offload(
+                    _loads_in_executor, content_bytes)
+
+            else:
+                content = _loads(await response.text())
+
+            if response.status != 200:
+                raise BotoEra(
+                    "Era occurred when talking with the server.",
+                    status_code=response.status,
+                    content=content)
+
+        if "ok" not in content.keys() or not content.ok:
+            err_msg = "The server responded with an error."
+
+            if "description" in content.keys():
+                err_msg += " The server said: {}".format(content.description)
+
+            raise BotoEra(
+                err_msg, status_code=response.status, content=content)
+
+        return content.result
+
+    async def offload(
+        self, func: Callable[..., Any], *args: Any,
+            executor: Optional[concurrent.futures.Executor]=None) -> Any:
+        """
+        Run the function in the executor and return the result.
+
+        When the executor is a `ProcessPoolExecutor`, the function and the
+        arguments should be picklable.
+        """
+        return await self._loop.run_in_executor(
+            executor or self._executor, functools.partial(func, *args))
+
+    def __getattr__(self, name: str) -> Any:
+        return functools.partial(self._send_anything, name)
+
+    async def __aenter__(self) -> "Boto":
+        return self
+
+    async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
+        await self._close()
+
+    def __aiter__(self) -> "Boto":
+        return self
+
+    async def __anext__(self) -> dikuto.BotoDikuto:
+        while (not self._pending_updates):
+            try:
+                updates = await self.get_updates(
+                    limit=(random.random() * 40 + 10),
+                    offset=self._update_offset,
+                    timeout=55)
+                # Fetch multiple updates(between 10 and 50) requests
+                # at the same time.
+
+                self._pending_updates.extend(updates)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception:
+                await asyncio.sleep((random.random() * 5 + 5))
+                # Wait a peroid (between 5 and 10 sec) of time
+                # before retrying.
+
+                self._err_times += 1
+
+                # If get_updates continuously errored more than 100
+                # times, raise the error. This gives your `boto`
+                # redundancy to bad network environments.
+                if self._err_times >= 100:
+                    self._err_times = 0
+                    raise
+
+            else:
+                self._err_times = 0
+
+        update = self._pending_updates.pop(0)
+        self._update_offset = update.update_id + 1
+
+        return update
+
+    async def _close(self) -> None:
+        """
+        Clean up the Boto.
+        """
+        try:
+            await self._close_client()
+
+        finally:
+            if self._profiler is not None:
+                self._profiler.stop()
+
+    async def _close_client(self) -> None:
+        if self._coalescer is not None:  # Send out the coalesced requests.
+            await self._coalescer.flush()
+
+        if self._update_offset != 0:
+            try:  # Flush out the processed offset with a short poll.
+                await self.get_updates(
+                    limit=0,
+                    offset=self._update_offset,
+                    timeout=0)
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception:  # Failed to short poll.
+                warnings.warn(
+                    ("Boto cannot upload the offset to the telegram server,"
+                     "the same update may be processed twice "
+                     "on the next start, the actual offset is {}.\n{}").format(
+                        self._update_offset, traceback.format_exc()),
+                    BotoWarning)
+
+                raise
+
+        await self._client.close()
+        self._client = None
+
+    def __del__(self) -> None:
+        if self._client is not None:
+            warnings.warn(
+                "Boto is not properly closed. "
+                "Await `Boto._close()` or wrap it under an "
+                "`async with` statement before it's been garbage collected.",
+                BotoWarning)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Outbound Request Coalescing.
+"""
+
+from typing import (
+    Any, Optional, Callable, Awaitable, Dict, Iterable, Tuple, Hashable)
+
+import asyncio
+
+__all__ = ["BotoCoalescer"]
+
+_Send = Callable[..., Awaitable[Any]]
+
+_DEFAULT_METHODS = (
+    "edit_message_text", "edit_message_caption", "edit_message_media",
+    "edit_message_reply_markup", "edit_message_live_location")
+
+_MAX_TEXT_LENGTH = 4096
+
+
+class _Pending:
+    __slots__ = ("send", "method_name", "kwargs", "fur", "handle")
+
+    def __init__(
+        self, send: _Send, method_name: str, kwargs: Dict[str, Any],
+            fur: asyncio.Future) -> None:
+        self.send = send
+        self.method_name = method_name
+        self.kwargs = kwargs
+        self.fur = fur
+        self.handle = None  # type: Optional[asyncio.Handle]
+
+
+class BotoCoalescer:
+    """
+    Coalescer of outbound requests, which can be provided as the `coalescer`
+    argument of the `Boto`.
+
+    Calls of the edit `methods` to the same message are held for `window`
+    seconds from the first call, only the latest one is sent and the
+    superseded ones are dropped. If `merge_messages` is `True`, consecutive
+    `send_message` calls to the same chat with the same options are merged
+    into one message joined by `separator` as long as the merged text fits
+    in a message.
+
+    All the callers of the coalesced calls receive the result of the request
+    actually sent. Coalesced requests of the same message or chat are sent
+    in order, but they may be sent after other requests made later.
+    """
+    def __init__(
+        self, *, methods: Iterable[str]=_DEFAULT_METHODS,
+        window: float=0.5, merge_messages: bool=False,
+        separator: str="\n",
+            loop: Optional[asyncio.AbstractEventLoop]=None) -> None:
+        # The loop is resolved when used, so the coalescer can be created
+        # before the loop that runs it.
+        self._loop = loop
+
+        self._methods = frozenset(methods)
+        self._window = window
+        self._merge_messages = merge_messages
+        self._separator = separator
+
+        self._pending = {}  # type: Dict[Hashable, _Pending]
+        self._inflight = {}  # type: Dict[Hashable, asyncio.Future]
+
+        self.dropped = 0
+        self.merged = 0
+
+    def _get_key(
+            self, method_name: str,
+            kwargs: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        if method_name in self._methods:
+            if "inline_message_id" in kwargs.keys():
+                return (method_name, kwargs["inline_message_id"])
+
+            if "chat_id" in kwargs.keys() and "message_id" in kwargs.keys():
+                return (method_name, kwargs["chat_id"], kwargs["message_id"])
+
+        elif method_name == "send_message" and self._merge_messages:
+            if "chat_id" in kwargs.keys() and \
+                    isinstance(kwargs.get("text"), str):
+                return (method_name, kwargs["chat_id"])
+
+        return None
+
+    def _merge(
+        self, pending: _Pending,
+            kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Messages are only merged when all the options are the same.
+        def get_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                name: value for name, value in kwargs.items()
+                if name != "text"}
+
+        if get_options(pending.kwargs) != get_options(kwargs):
+            return None
+
+        text = pending.kwargs["text"] + self._separator + kwargs["text"]
+
+        if len(text) > _MAX_TEXT_LENGTH:
+            return None
+
+        merged = dict(kwargs)
+        merged["text"] = text
+
+        return merged
+
+    async def send(
+        self, send: _Send, method_name: str,
+            kwargs: Dict[str, Any]) -> Any:
+        """
+        Send the request through `send`, or coalesce it with the pending one.
+        """
+        key = self._get_key(method_name, kwargs)
+
+        if key is None:
+            return await send(method_name, **kwargs)
+
+        pending = self._pending.get(key)
+
+        if pending is not None:
+            if method_name != "send_message":
+                pending.kwargs = kwargs
+                self.dropped += 1
+
+                return await asyncio.shield(pending.fur)
+
+            merged = self._merge(pending, kwargs)
+
+            if merged is not None:
+                pending.kwargs = merged
+                self.merged += 1
+
+                return await asyncio.shield(pending.fur)
+
+            # Not mergeable, send out the pending message first.
+            self._flush(key)
+
+        loop = self._loop or asyncio.get_event_loop()
+
+        pending = self._pending[key] = _Pending(
+            send, method_name, kwargs, loop.create_future())
+        # Retrieve the exception in case all the callers have been cancelled.
+        pending.fur.add_done_callback(
+            lambda fur: fur.cancelled() or fur.exception())
+        pending.handle = loop.call_later(self._window, self._flush, key)
+
+        return await asyncio.shield(pending.fur)
+
+    def _flush(self, key: Hashable) -> None:
+        pending = self._pending.pop(key)
+        pending.handle.cancel()
+
+        fur = asyncio.ensure_future(
+            self._send_pending(pending, self._inflight.get(key)),
+            loop=self._loop)
+        self._inflight[key] = fur
+
+        def on_done(_: asyncio.Future) -> None:
+            if self._inflight.get(key) is fur:
+                del self._inflight[key]
+
+        fur.add_done_callback(on_done)
+
+    async def _send_pending(
+        self, pending: _Pending,
+            previous: Optional[asyncio.Future]) -> None:
+        if previous is not None:  # Keep the order of the same key.
+            await asyncio.wait([previous])
+
+        try:
+            result = await pending.send(pending.method_name, **pending.kwargs)
+
+        except asyncio.CancelledError:
+            pending.fur.cancel()
+
+            raise
+
+        except Exception as e:
+            pending.fur.set_exception(e)
+
+        else:
+            pending.fur.set_result(result)
+
+    async def flush(self) -> None:
+        """
+        Send out all the pending requests and wait for them.
+
+        This is called by the `Boto` when it is closed.
+        """
+        for key in list(self._pending.keys()):
+            self._flush(key)
+
+        if self._inflight:
+            await asyncio.wait(list(self._inflight.values()))
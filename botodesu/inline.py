@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Inline Query Answering.
+"""
+
+from typing import Any, Optional, Callable, Awaitable, Dict, List, Hashable
+
+from . import dikuto
+from . import body
+
+import asyncio
+import collections
+
+__all__ = ["InlineQueryHelper"]
+
+_ResultsFunc = Callable[[str, dikuto.BotoDikuto], Awaitable[List[Any]]]
+
+_KeyFunc = Callable[[dikuto.BotoDikuto], Hashable]
+
+
+def _default_key(inline_query: dikuto.BotoDikuto) -> Hashable:
+    return (inline_query.query, inline_query.get("offset", ""))
+
+
+class InlineQueryHelper:
+    """
+    Helper to answer inline queries.
+
+    Inline queries are sent on every keystroke. This helper waits `debounce`
+    seconds before working on an inline query, and drops it if a newer one
+    from the same user has arrived during the period. The results are
+    computed by `func` once per cache key, serialized once and kept in an
+    LRU cache of `cache_size` keys. Concurrent inline queries with the same
+    cache key share one computation.
+
+    The cache key is made of the query string and the offset by default, so
+    the results are shared between users. If the results depend on anything
+    else of the inline query(e.g.: the user or the location), provide a
+    `key` function returning a hashable value including it.
+
+    The `handle` method can be registered to a `BotoRuta` as the handler of
+    `inline_query` updates.
+
+    :arg func: A coroutine function accepting the query string and the
+        inline query, and returning the list of results.
+    :arg key: A function accepting the inline query and returning the cache
+        key, default to `(query, offset)`.
+    :arg answer_kwargs: Extra arguments of `answer_inline_query`,
+        e.g.: `cache_time`.
+    """
+    def __init__(
+        self, func: _ResultsFunc, *, key: _KeyFunc=_default_key,
+        debounce: float=0.3, cache_size: int=1024,
+            **answer_kwargs: Any) -> None:
+        self._func = func
+        self._key = key
+        self._debounce = debounce
+        self._cache_size = cache_size
+        self._answer_kwargs = answer_kwargs
+
+        # cache key -> serialized results.
+        self._cache = collections.OrderedDict(
+            )  # type: collections.OrderedDict
+        # cache key -> future of serialized results.
+        self._computing = {}  # type: Dict[Hashable, asyncio.Future]
+        # user id -> id of the latest inline query.
+        self._latest = {}  # type: Dict[Any, str]
+
+    def invalidate(self, key: Optional[Hashable]=None) -> None:
+        """
+        Remove the results of the cache key from the cache, or clear the
+        cache if `key` is `None`.
+        """
+        if key is None:
+            self._cache.clear()
+
+        else:
+            self._cache.pop(key, None)
+
+    async def _compute(
+        self, key: Hashable,
+            inline_query: dikuto.BotoDikuto) -> body.BotoJeison:
+        results = body.BotoJeison(
+            await self._func(inline_query.query, inline_query))
+
+        self._cache[key] = results
+
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+        return results
+
+    async def get_results(
+            self, inline_query: dikuto.BotoDikuto) -> body.BotoJeison:
+        """
+        Return the serialized results of the inline query.
+        """
+        key = self._key(inline_query)
+        results = self._cache.get(key)
+
+        if results is not None:
+            self._cache.move_to_end(key)
+
+            return results
+
+        fur = self._computing.get(key)
+
+        if fur is None:
+            fur = self._computing[key] = asyncio.ensure_future(
+                self._compute(key, inline_query))
+
+            def on_done(fur: asyncio.Future) -> None:
+                self._computing.pop(key, None)
+
+                # Retrieve the exception in case all the waiters have been
+                # cancelled.
+                if not fur.cancelled():
+                    fur.exception()
+
+            fur.add_done_callback(on_done)
+
+        # Shield the shared computation from the cancellation of one waiter.
+        return await asyncio.shield(fur)
+
+    async def handle(self, boto: Any, update: dikuto.BotoDikuto) -> bool:
+        """
+        Answer the inline query of the update.
+
+        Returns `False` if the inline query has been superseded.
+        """
+        inline_query = update.inline_query
+        user_id = inline_query["from"]["id"]
+
+        self._latest[user_id] = inline_query.id
+
+        try:
+            if self._debounce > 0:
+                await asyncio.sleep(self._debounce)
+
+            if self._latest.get(user_id) != inline_query.id:
+                return False
+
+            results = await self.get_results(inline_query)
+
+            if self._latest.get(user_id) != inline_query.id:
+                return False
+
+            await boto.answer_inline_query(
+                inline_query_id=inline_query.id, results=results,
+                **self._answer_kwargs)
+
+            return True
+
+        finally:
+            if self._latest.get(user_id) == inline_query.id:
+                del self._latest[user_id]
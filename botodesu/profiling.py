@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Event Loop and Handler Profiling.
+"""
+
+from typing import (
+    Any, Optional, Dict, List, Awaitable, Generator, TextIO, Callable)
+
+from . import dikuto
+
+import asyncio
+import collections
+import threading
+import traceback
+import os.path
+import sys
+import time
+
+__all__ = ["BotoProfiler"]
+
+_thread_time = getattr(time, "thread_time", time.process_time)
+
+
+class _Stats:
+    __slots__ = ("count", "wall", "cpu", "max_wall")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.max_wall = 0.0
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.max_wall = max(self.max_wall, wall)
+
+
+class _Call:
+    __slots__ = ("name", "update_id", "cpu", "stacks")
+
+    def __init__(
+        self, name: str, update_id: Any,
+            parent: Optional["_Call"]=None) -> None:
+        self.name = name
+        self.update_id = update_id if parent is None else parent.update_id
+        self.cpu = 0.0
+
+        # Stacks of the blocking code, shared with the parent call.
+        self.stacks = [] if parent is None else \
+            parent.stacks  # type: List[str]
+
+
+class _Profiled:
+    def __init__(
+        self, profiler: "BotoProfiler", coro: Awaitable[Any],
+            call: _Call) -> None:
+        self._profiler = profiler
+        self._coro = coro
+        self._call = call
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self._profiler._drive(self._coro, self._call)
+
+
+def _collapse_stack(frame: Any) -> str:
+    frames = []
+
+    while frame is not None:
+        code = frame.f_code
+        frames.append("{}:{}:{}".format(
+            os.path.basename(code.co_filename), code.co_name,
+            frame.f_lineno))
+        frame = frame.f_back
+
+    return ";".join(reversed(frames))
+
+
+class BotoProfiler:
+    """
+    Opt-in profiler of the `Boto`, which can be provided as the `profiler`
+    argument of the `Boto`.
+
+    It measures the event loop lag with a timer firing every `lag_interval`
+    seconds, and records the wall time and CPU time of API methods and the
+    handlers dispatched by `BotoRuta`. The CPU time is measured only when the
+    coroutine is running, so time spent waiting for the network is not
+    counted.
+
+    A watchdog thread checks the timer every `stack_interval` seconds, and
+    samples the stack of the event loop thread when the timer is late for
+    more than `slow_threshold` seconds. Handlers that take longer than
+    `slow_threshold` seconds are flagged with the stacks sampled while they
+    were blocking the event loop. A handler with a large wall time but
+    without any stack is waiting for the network.
+
+    Only `sample_rate` of the handlers are profiled, which keeps the overhead
+    low enough in production. API methods called by profiled handlers are
+    always profiled, `sample_rate` of the other API method calls(e.g.:
+    `get_updates` of `async for`) are profiled. The watchdog thread and the
+    lag timer run regardless of `sample_rate`, their costs can be tuned with
+    `stack_interval` and `lag_interval`.
+
+    :arg summary_interval: If provided, a summary is written to `output`
+        (default to `sys.stderr`) every `summary_interval` seconds, and the
+        sampled stacks are written to `flamegraph_path` in the collapsed
+        format of FlameGraph if provided.
+    """
+    def __init__(
+        self, *, lag_interval: float=0.1, slow_threshold: float=0.1,
+        stack_interval: float=0.01, sample_rate: float=1.0,
+        summary_interval: Optional[float]=None,
+        output: Optional[TextIO]=None,
+            flamegraph_path: Optional[str]=None) -> None:
+        self._lag_interval = lag_interval
+        self._slow_threshold = slow_threshold
+        self._stack_interval = stack_interval
+        self._sample_rate = sample_rate
+        self._summary_interval = summary_interval
+        self._output = output
+        self._flamegraph_path = flamegraph_path
+
+        self._loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._loop_thread_id = None  # type: Optional[int]
+
+        self._lag_stats = _Stats()
+        self._handler_stats = collections.defaultdict(
+            _Stats)  # type: Dict[str, _Stats]
+        self._api_stats = collections.defaultdict(
+            _Stats)  # type: Dict[str, _Stats]
+
+        self._slow_updates = collections.deque(
+            maxlen=100)  # type: collections.deque
+
+        self._stacks = collections.Counter(
+            )  # type: collections.Counter
+        self._stacks_lock = threading.Lock()
+
+        self._sample_acc = 0.0
+        self._api_sample_acc = 0.0
+        self._current = None  # type: Optional[_Call]
+
+        self._next_tick_at = None  # type: Optional[float]
+        self._tick_handle = None  # type: Optional[asyncio.Handle]
+        self._summary_handle = None  # type: Optional[asyncio.Handle]
+
+        self._stopped = threading.Event()
+        self._watchdog = None  # type: Optional[threading.Thread]
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Start profiling on the event loop, it should be called from the
+        thread running the loop.
+
+        This is called by the `Boto` when it is created.
+        """
+        if self._loop is not None:
+            return
+
+        self._loop = loop
+        # Set before the first tick, so the blocking calls right after the
+        # start are sampled as well.
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+
+        self._schedule_tick()
+
+        if self._summary_interval is not None:
+            self._summary_handle = loop.call_later(
+                self._summary_interval, self._summarize)
+
+        self._watchdog = threading.Thread(
+            target=self._watch, name="botodesu-profiler", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """
+        Stop profiling and write the last summary if `summary_interval`
+        has been provided.
+
+        This is called by the `Boto` when it is closed.
+        """
+        if self._loop is None:
+            return
+
+        self._stopped.set()
+        self._watchdog.join()
+
+        for handle in (self._tick_handle, self._summary_handle):
+            if handle is not None:
+                handle.cancel()
+
+        self._tick_handle = self._summary_handle = None
+        self._next_tick_at = None
+        self._loop = None
+
+        if self._summary_interval is not None:
+            self.dump()
+
+    def _schedule_tick(self) -> None:
+        self._next_tick_at = time.monotonic() + self._lag_interval
+        self._tick_handle = self._loop.call_later(
+            self._lag_interval, self._tick)
+
+    def _tick(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+
+        lag = max(time.monotonic() - self._next_tick_at, 0.0)
+        self._lag_stats.add(lag, 0.0)
+
+        self._schedule_tick()
+
+    def _summarize(self) -> None:
+        self.dump()
+
+        self._summary_handle = self._loop.call_later(
+            self._summary_interval, self._summarize)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self._stack_interval):
+            next_tick_at = self._next_tick_at
+
+            if next_tick_at is None or self._loop_thread_id is None or \
+                    time.monotonic() - next_tick_at < self._slow_threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+
+            if frame is None:
+                continue
+
+            collapsed = _collapse_stack(frame)
+
+            with self._stacks_lock:
+                self._stacks[collapsed] += 1
+
+            call = self._current
+
+            if call is not None and not call.stacks:
+                call.stacks.append("".join(traceback.format_stack(frame)))
+
+            del frame
+
+    def _drive(
+            self, coro: Awaitable[Any], call: _Call) -> Generator[
+                Any, None, Any]:
+        it = coro.__await__()
+        value, error = None, None  # type: Any, Optional[BaseException]
+
+        while True:
+            previous, self._current = self._current, call
+            start = _thread_time()
+
+            try:
+                if error is None:
+                    yielded = it.send(value)
+
+                else:
+                    yielded = it.throw(error)
+
+            except StopIteration as e:
+                return e.value
+
+            finally:
+                call.cpu += _thread_time() - start
+                self._current = previous
+
+            try:
+                value, error = (yield yielded), None
+
+            except GeneratorExit:
+                it.close()
+
+                raise
+
+            except BaseException as e:
+                value, error = None, e
+
+    def _should_sample(self) -> bool:
+        self._sample_acc += self._sample_rate
+
+        if self._sample_acc < 1:
+            return False
+
+        self._sample_acc -= 1
+
+        return True
+
+    def _should_sample_api(self) -> bool:
+        if self._current is not None:  # Called by a profiled handler.
+            return True
+
+        self._api_sample_acc += self._sample_rate
+
+        if self._api_sample_acc < 1:
+            return False
+
+        self._api_sample_acc -= 1
+
+        return True
+
+    def profile_handler(
+        self, coro: Awaitable[Any], update: dikuto.BotoDikuto,
+            handler: Callable[..., Any]) -> Awaitable[Any]:
+        """
+        Wrap the coroutine of the handler to record its time if the handler
+        is sampled.
+        """
+        if not self._should_sample():
+            return coro
+
+        return self._profile_handler(coro, update, handler)
+
+    async def _profile_handler(
+        self, coro: Awaitable[Any], update: dikuto.BotoDikuto,
+            handler: Callable[..., Any]) -> Any:
+        name = getattr(handler, "__qualname__", repr(handler))
+        call = _Call(name, update.get("update_id"))
+
+        start = time.perf_counter()
+
+        try:
+            return await _Profiled(self, coro, call)
+
+        finally:
+            wall = time.perf_counter() - start
+            self._handler_stats[name].add(wall, call.cpu)
+
+            if wall >= self._slow_threshold:
+                self._slow_updates.append(dikuto.BotoDikuto(
+                    update_id=call.update_id, handler=name, wall=wall,
+                    cpu=call.cpu, stacks=call.stacks))
+
+    def profile_api(
+            self, method_name: str, coro: Awaitable[Any]) -> Awaitable[Any]:
+        """
+        Wrap the coroutine of the API method to record its time if the call
+        is sampled.
+        """
+        if not self._should_sample_api():
+            return coro
+
+        return self._profile_api(method_name, coro)
+
+    async def _profile_api(
+            self, method_name: str, coro: Awaitable[Any]) -> Any:
+        call = _Call(method_name, None, parent=self._current)
+
+        start = time.perf_counter()
+
+        try:
+            return await _Profiled(self, coro, call)
+
+        finally:
+            self._api_stats[method_name].add(
+                time.perf_counter() - start, call.cpu)
+
+    def get_summary(self) -> str:
+        """
+        Return the summary as text.
+        """
+        lines = ["Botodesu Profiler Summary"]
+
+        lag = self._lag_stats
+        lines.append("Event loop lag: mean {:.1f} ms, max {:.1f} ms.".format(
+            lag.wall / lag.count * 1000 if lag.count else 0.0,
+            lag.max_wall * 1000))
+
+        for title, all_stats in (
+                ("Handlers", self._handler_stats),
+                ("API methods", self._api_stats)):
+            lines.append("{}:".format(title))
+
+            for name, stats in sorted(
+                    all_stats.items(), key=lambda i: -i[1].wall):
+                lines.append(
+                    "  {}: {} calls, wall {:.1f} ms(mean) / {:.1f} ms(max), "
+                    "cpu {:.1f} ms(mean)".format(
+                        name, stats.count, stats.wall / stats.count * 1000,
+                        stats.max_wall * 1000,
+                        stats.cpu / stats.count * 1000))
+
+        lines.append("Slow updates:")
+
+        for slow_update in self._slow_updates:
+            lines.append(
+                "  update {}, {}: wall {:.1f} ms, cpu {:.1f} ms".format(
+                    slow_update.update_id, slow_update.handler,
+                    slow_update.wall * 1000, slow_update.cpu * 1000))
+
+            for stack in slow_update.stacks:
+                lines.append("    Blocked at:")
+                lines.extend(
+                    "    " + line for line in stack.rstrip().splitlines())
+
+        return "\n".join(lines) + "\n"
+
+    def get_slow_updates(self) -> List[dikuto.BotoDikuto]:
+        """
+        Return the recent updates that took longer than the threshold.
+        """
+        return list(self._slow_updates)
+
+    def write_flamegraph(self, path: str) -> None:
+        """
+        Write the stacks sampled while the event loop was blocked in the
+        collapsed format, which can be read by `flamegraph.pl`.
+        """
+        with self._stacks_lock:
+            stacks = list(self._stacks.items())
+
+        with open(path, "w") as f:
+            for stack, count in stacks:
+                f.write("{} {}\n".format(stack, count))
+
+    def dump(self) -> None:
+        """
+        Write the summary to the output, and the flamegraph to
+        `flamegraph_path` if provided.
+        """
+        output = self._output or sys.stderr
+        output.write(self.get_summary())
+        output.flush()
+
+        if self._flamegraph_path is not None:
+            self.write_flamegraph(self._flamegraph_path)
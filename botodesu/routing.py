@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Update Routing.
+"""
+
+from typing import (
+    Any, Optional, Callable, Awaitable, Dict, List, Set, Union, Pattern)
+
+from . import dikuto
+from . import exceptions
+
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import re
+
+__all__ = ["BotoRuta"]
+
+_Handler = Callable[[Any, dikuto.BotoDikuto], Awaitable[Any]]
+
+_Middleware = Callable[
+    [Any, dikuto.BotoDikuto, Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+_Predicate = Callable[[dikuto.BotoDikuto], bool]
+
+_Offload = Union[bool, concurrent.futures.Executor]
+
+# The field of the payload used for `text` and `regex` filters,
+# in the order of precedence.
+_TEXT_FIELDS = ("text", "caption", "query", "data")
+
+_log = logging.getLogger(__name__)
+
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+class _HandlerEntry:
+    __slots__ = ("func", "regex", "predicate")
+
+    def __init__(
+        self, func: _Handler, regex: Optional[Pattern]=None,
+            predicate: Optional[_Predicate]=None) -> None:
+        self.func = func
+        self.regex = regex
+        self.predicate = predicate
+
+    def matches(
+            self, update: dikuto.BotoDikuto, text: Optional[str]) -> bool:
+        if self.regex is not None:
+            if text is None or self.regex.search(text) is None:
+                return False
+
+        if self.predicate is not None and not self.predicate(update):
+            return False
+
+        return True
+
+
+def get_update_type(update: dikuto.BotoDikuto) -> Optional[str]:
+    """
+    Return the type of the update (e.g.: `message`, `callback_query`).
+    """
+    for key in update.keys():
+        if key != "update_id":
+            return key
+
+    return None
+
+
+def _to_attr_name(method_name: str) -> str:
+    # Telegram spells the API methods in camelCase(e.g.: `sendMessage`).
+    return _CAMEL_CASE_BOUNDARY.sub("_", method_name).lower()
+
+
+def _offloaded(
+    func: Callable[[dikuto.BotoDikuto], Any],
+        executor: Optional[concurrent.futures.Executor]) -> _Handler:
+    async def handler(boto: Any, update: dikuto.BotoDikuto) -> None:
+        results = await boto.offload(func, update, executor=executor)
+
+        if results is None:
+            return
+
+        if isinstance(results, dict):
+            results = [results]
+
+        func_name = getattr(func, "__qualname__", repr(func))
+
+        if not isinstance(results, (list, tuple)) or not all(
+                isinstance(result, dict) for result in results):
+            raise exceptions.BotoEra(
+                "The result of {} should be a dict or a list of dicts, "
+                "got: {!r}.".format(func_name, results))
+
+        for result in results:
+            kwargs = dict(result)
+            method_name = kwargs.pop("method", None)
+
+            if not isinstance(method_name, str):
+                raise exceptions.BotoEra(
+                    "The result of {} should contain the name of the API "
+                    "method as `method`, got: {!r}.".format(
+                        func_name, result))
+
+            # Sent as a request directly, so the name is validated as an API
+            # method and never resolves to an attribute of the `Boto`.
+            await boto._send_anything(_to_attr_name(method_name), **kwargs)
+
+    return functools.wraps(func)(handler)
+
+
+def _get_text(payload: Any) -> Optional[str]:
+    if not isinstance(payload, dict):
+        return None
+
+    for field in _TEXT_FIELDS:
+        value = payload.get(field)
+
+        if isinstance(value, str):
+            return value
+
+    return None
+
+
+class BotoRuta:
+    """
+    Ru-ta(Router) of the updates.
+
+    Handlers are indexed by the update type, commands and exact texts are
+    resolved with a hash lookup, so the cost of dispatching an update does not
+    grow with the number of commands registered. Regular expressions are
+    compiled once on registration.
+
+    For each update, the first matching handler is selected in the following
+    order: commands, exact texts, then other handlers in the order of
+    registration.
+
+    A handler is a coroutine function accepting the `Boto` and the update.
+
+    A middleware is a coroutine function accepting the `Boto`, the update and
+    a `call_next` coroutine function which invokes the rest of the chain.
+    Middlewares are invoked in the order of registration.
+
+    A handler registered with `offload` is a CPU-bound function accepting
+    the update, which runs in the executor of the `Boto`(or the executor
+    provided as `offload`). It may return an API call, or a list of them, in
+    the form of `{"method": "send_message", "chat_id": ..., ...}`, which will
+    be sent on the event loop. The method name may be spelled in camelCase
+    as in the Telegram documentation(e.g.: `sendMessage`).
+
+    :arg username: The username of the bot. If provided, commands mentioning
+        other bots(e.g.: `/start@other_bot`) will be ignored.
+    """
+    def __init__(self, *, username: Optional[str]=None) -> None:
+        self._username = username.lower() if username else None
+
+        # update_type -> command -> handler.
+        self._commands = {}  # type: Dict[str, Dict[str, _HandlerEntry]]
+        # update_type -> text -> handler.
+        self._texts = {}  # type: Dict[str, Dict[str, _HandlerEntry]]
+        # update_type -> handlers.
+        self._handlers = {}  # type: Dict[str, List[_HandlerEntry]]
+
+        self._middlewares = []  # type: List[_Middleware]
+
+        self._pending = set()  # type: Set[asyncio.Future]
+
+    def add_handler(
+        self, func: _Handler, update_type: str="message", *,
+        command: Optional[str]=None, text: Optional[str]=None,
+        regex: Optional[Union[str, Pattern]]=None,
+        predicate: Optional[_Predicate]=None,
+            offload: _Offload=False) -> None:
+        """
+        Register a handler.
+
+        :arg update_type: The type of the update, default to `message`.
+        :arg command: The command without the leading slash.
+        :arg text: The exact text to match.
+        :arg regex: The regular expression searched in the text.
+        :arg predicate: A callable accepting the update and returning
+            whether the handler should be invoked.
+        :arg offload: Whether the handler is a CPU-bound function, or the
+            executor to run it.
+        """
+        if offload is not False:
+            func = _offloaded(func, None if offload is True else offload)
+
+        if command is not None:
+            if text is not None or regex is not None or \
+                    predicate is not None:
+                raise exceptions.BotoEra(
+                    "Command handlers cannot be combined with other filters.")
+
+            command = command.lstrip("/").lower()
+            commands = self._commands.setdefault(update_type, {})
+
+            if command in commands.keys():
+                raise exceptions.BotoEra(
+                    "Command /{} has already been registered.".format(
+                        command))
+
+            commands[command] = _HandlerEntry(func)
+
+            return
+
+        if text is not None and regex is None and predicate is None:
+            texts = self._texts.setdefault(update_type, {})
+
+            if text in texts.keys():
+                raise exceptions.BotoEra(
+                    "Text {!r} has already been registered.".format(text))
+
+            texts[text] = _HandlerEntry(func)
+
+            return
+
+        if text is not None:
+            regex = r"\A{}\Z".format(re.escape(text))
+
+        if isinstance(regex, str):
+            regex = re.compile(regex)
+
+        self._handlers.setdefault(update_type, []).append(
+            _HandlerEntry(func, regex=regex, predicate=predicate))
+
+    def on(self, update_type: str="message", **kwargs: Any) -> Callable[
+            [_Handler], _Handler]:
+        """
+        Decorator version of `add_handler`.
+        """
+        def decorator(func: _Handler) -> _Handler:
+            self.add_handler(func, update_type, **kwargs)
+
+            return func
+
+        return decorator
+
+    def command(self, command: str, update_type: str="message") -> Callable[
+            [_Handler], _Handler]:
+        """
+        Decorator to register a command handler.
+        """
+        return self.on(update_type, command=command)
+
+    def add_middleware(self, middleware: _Middleware) -> None:
+        """
+        Register a middleware.
+        """
+        self._middlewares.append(middleware)
+
+    def middleware(self, middleware: _Middleware) -> _Middleware:
+        """
+        Decorator version of `add_middleware`.
+        """
+        self.add_middleware(middleware)
+
+        return middleware
+
+    def _parse_command(self, text: str) -> Optional[str]:
+        if not text.startswith("/"):
+            return None
+
+        command, _, username = text.split(None, 1)[0][1:].partition("@")
+
+        if not command:
+            return None
+
+        if username and self._username is not None and \
+                username.lower() != self._username:
+            return None
+
+        return command.lower()
+
+    def find_handler(
+            self, update: dikuto.BotoDikuto) -> Optional[_Handler]:
+        """
+        Find the handler of the update, returns `None` if no handler matches.
+        """
+        update_type = get_update_type(update)
+
+        if update_type is None:
+            return None
+
+        text = _get_text(update[update_type])
+
+        if text is not None:
+            commands = self._commands.get(update_type)
+
+            if commands:
+                command = self._parse_command(text)
+
+                if command is not None and command in commands.keys():
+                    return commands[command].func
+
+            texts = self._texts.get(update_type)
+
+            if texts and text in texts.keys():
+                return texts[text].func
+
+        for entry in self._handlers.get(update_type, ()):
+            if entry.matches(update, text):
+                return entry.func
+
+        return None
+
+    async def _call_next(
+        self, index: int, boto: Any, update: dikuto.BotoDikuto,
+            handler: _Handler) -> Any:
+        if index >= len(self._middlewares):
+            profiler = getattr(boto, "profiler", None)
+
+            if profiler is None:
+                return await handler(boto, update)
+
+            # Only the handler is profiled, excluding the middlewares.
+            return await profiler.profile_handler(
+                handler(boto, update), update, handler)
+
+        call_next = functools.partial(
+            self._call_next, index + 1, boto, update, handler)
+
+        return await self._middlewares[index](boto, update, call_next)
+
+    async def dispatch(self, boto: Any, update: dikuto.BotoDikuto) -> bool:
+        """
+        Dispatch the update to its handler through the middlewares.
+
+        Returns `True` if a handler has been found.
+        """
+        handler = self.find_handler(update)
+
+        if handler is None:
+            return False
+
+        await self._call_next(0, boto, update, handler)
+
+        return True
+
+    async def _dispatch_and_log(
+            self, boto: Any, update: dikuto.BotoDikuto) -> None:
+        try:
+            await self.dispatch(boto, update)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception:
+            _log.exception(
+                "Era occurred when handling update %s.",
+                update.get("update_id"))
+
+    async def drain(self) -> None:
+        """
+        Wait until all the in-flight handlers started by `run` finish.
+        """
+        while self._pending:
+            await asyncio.wait(set(self._pending))
+
+    async def run(self, boto: Any) -> None:
+        """
+        Fetch updates from the `Boto` and handle them concurrently.
+
+        Exceptions raised by the handlers are logged to the
+        `botodesu.routing` logger. When `run` returns or is cancelled, it
+        waits for the in-flight handlers to finish.
+        """
+        try:
+            async for update in boto:
+                fur = asyncio.ensure_future(
+                    self._dispatch_and_log(boto, update))
+
+                self._pending.add(fur)
+                fur.add_done_callback(self._pending.discard)
+
+        finally:
+            await self.drain()
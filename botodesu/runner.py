@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Event Loop Runner.
+"""
+
+from typing import Any, Optional, Callable, Awaitable, Union, Iterable
+
+from . import exceptions
+
+import asyncio
+import concurrent.futures
+import functools
+import warnings
+import signal
+import os
+
+__all__ = ["run"]
+
+_DEFAULT_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def new_event_loop(loop: str="asyncio") -> asyncio.AbstractEventLoop:
+    """
+    Create an event loop of the kind, which can be `asyncio` or `uvloop`.
+
+    If uvloop is not installed, a `BotoWarning` is emitted and an asyncio
+    event loop is created instead.
+    """
+    if loop == "uvloop":
+        try:
+            import uvloop
+
+        except ImportError:
+            warnings.warn(
+                "uvloop is not installed, falling back to asyncio.",
+                exceptions.BotoWarning)
+
+        else:
+            return uvloop.new_event_loop()
+
+    elif loop != "asyncio":
+        raise exceptions.BotoEra("Unknown event loop: {}.".format(loop))
+
+    return asyncio.new_event_loop()
+
+
+def _on_signal(
+        loop: asyncio.AbstractEventLoop, task: asyncio.Future,
+        shutdown_timeout: Optional[float]) -> None:
+    if task.done():
+        return
+
+    # The first signal cancels the main task, which gives the `Boto` a chance
+    # to finish the in-flight handlers and flush out the offset. It will be
+    # cancelled again if it does not finish within the timeout or another
+    # signal arrives.
+    task.cancel()
+
+    if shutdown_timeout is not None:
+        loop.call_later(shutdown_timeout, task.cancel)
+
+
+def run(
+    main: Union[Callable[[], Awaitable[Any]], Awaitable[Any]], *,
+    loop: str="asyncio", executor_workers: Optional[int]=None,
+    shutdown_timeout: Optional[float]=30,
+        signals: Iterable[int]=_DEFAULT_SIGNALS) -> Any:
+    """
+    Run the coroutine(or coroutine function) on a new event loop and close
+    the loop when it finishes.
+
+    When one of the `signals` is received, the main task is cancelled.
+    `BotoRuta.run` waits for the in-flight handlers when cancelled, and
+    `Boto` flushes out the offset when leaving the `async with` statement.
+    The main task will be cancelled again if it has not finished after
+    `shutdown_timeout` seconds.
+
+    Returns the result of the main coroutine, or `None` if it has been
+    cancelled by a signal.
+
+    :arg loop: The kind of the event loop, `asyncio` or `uvloop`.
+    :arg executor_workers: The number of threads of the default executor,
+        default to the number of processors plus 4, capped at 32.
+    """
+    event_loop = new_event_loop(loop)
+
+    if executor_workers is None:
+        executor_workers = min(32, (os.cpu_count() or 1) + 4)
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=executor_workers)
+    event_loop.set_default_executor(executor)
+
+    asyncio.set_event_loop(event_loop)
+
+    try:
+        task = asyncio.ensure_future(
+            main() if callable(main) else main, loop=event_loop)
+
+        handled_signals = []
+
+        for sig in signals:
+            try:
+                event_loop.add_signal_handler(
+                    sig, functools.partial(
+                        _on_signal, event_loop, task, shutdown_timeout))
+
+            except (NotImplementedError, RuntimeError):
+                # Windows or not in the main thread.
+                continue
+
+            handled_signals.append(sig)
+
+        try:
+            return event_loop.run_until_complete(task)
+
+        except asyncio.CancelledError:
+            return None
+
+        finally:
+            for sig in handled_signals:
+                event_loop.remove_signal_handler(sig)
+
+            all_tasks = getattr(asyncio, "all_tasks", None) or \
+                asyncio.Task.all_tasks
+            pending = [
+                fur for fur in all_tasks(loop=event_loop) if not fur.done()]
+
+            for fur in pending:
+                fur.cancel()
+
+            if pending:
+                event_loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True))
+
+            if hasattr(event_loop, "shutdown_asyncgens"):
+                event_loop.run_until_complete(event_loop.shutdown_asyncgens())
+
+    finally:
+        executor.shutdown(wait=True)
+
+        asyncio.set_event_loop(None)
+        event_loop.close()
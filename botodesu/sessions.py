@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+# The MIT License (MIT)
+#
+# Copyright (c) 2017 Kaede Hoshikawa
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Per-chat Session Storage.
+"""
+
+from typing import Any, Optional, Dict, List, Union, Tuple
+
+from . import dikuto
+from . import exceptions
+from . import routing
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import sqlite3
+import json
+import time
+
+__all__ = [
+    "BaseSessionStore", "MemorySessionStore", "SqliteSessionStore",
+    "RedisSessionStore"]
+
+
+def get_session_key(update: dikuto.BotoDikuto) -> Optional[str]:
+    """
+    Return the session key of an update, which is made of the id of the chat
+    and the id of the user, or `None` if neither of them is available.
+    """
+    update_type = routing.get_update_type(update)
+
+    if update_type is None:
+        return None
+
+    payload = update[update_type]
+
+    if not isinstance(payload, dict):
+        return None
+
+    chat = payload.get("chat")
+
+    if chat is None and isinstance(payload.get("message"), dict):
+        chat = payload["message"].get("chat")  # callback_query.
+
+    user = payload.get("from")
+
+    if chat is None and user is None:
+        return None
+
+    return "{}:{}".format(
+        chat["id"] if chat is not None else "",
+        user["id"] if user is not None else "")
+
+
+class _KeyLock:
+    __slots__ = ("lock", "refs")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+
+class _LockContext:
+    def __init__(self, store: "BaseSessionStore", key: str) -> None:
+        self._store = store
+        self._key = key
+
+    async def __aenter__(self) -> None:
+        key_lock = self._store._locks.get(self._key)
+
+        if key_lock is None:
+            key_lock = self._store._locks[self._key] = _KeyLock()
+
+        key_lock.refs += 1
+
+        try:
+            await key_lock.lock.acquire()
+
+        except BaseException:
+            self._release_ref(key_lock)
+
+            raise
+
+    async def __aexit__(self, *args: Any) -> None:
+        key_lock = self._store._locks[self._key]
+        key_lock.lock.release()
+
+        self._release_ref(key_lock)
+
+    def _release_ref(self, key_lock: _KeyLock) -> None:
+        key_lock.refs -= 1
+
+        if key_lock.refs == 0:  # Nobody is waiting, drop the lock.
+            del self._store._locks[self._key]
+
+
+class _SessionContext:
+    def __init__(self, store: "BaseSessionStore", key: str) -> None:
+        self._store = store
+        self._key = key
+
+        self._lock_ctx = _LockContext(store, key)
+        self._session = None  # type: Optional[dikuto.BotoDikuto]
+
+    async def __aenter__(self) -> dikuto.BotoDikuto:
+        await self._lock_ctx.__aenter__()
+
+        try:
+            session = await self._store.load(self._key)
+
+        except BaseException:
+            await self._lock_ctx.__aexit__(None, None, None)
+
+            raise
+
+        self._session = dikuto.BotoDikuto(session or {})
+
+        return self._session
+
+    async def __aexit__(self, exc_type: Any, *args: Any) -> None:
+        try:
+            if exc_type is not None:
+                return
+
+            if self._session:
+                await self._store.save(self._key, self._session)
+
+            else:  # Empty sessions are not kept.
+                await self._store.delete(self._key)
+
+        finally:
+            await self._lock_ctx.__aexit__(None, None, None)
+
+
+class BaseSessionStore:
+    """
+    Base class of session stores.
+
+    Sessions are dictionaries. Subclasses should implement `load`, `save`,
+    `delete` and optionally `close`.
+
+    The recommended way to access a session is through `session` or
+    `session_of`, which hold a per-key lock until the session is saved, so
+    concurrent handlers of the same chat will not race with each other.
+
+    .. note::
+       The locks are only effective inside the current process.
+    """
+    def __init__(self) -> None:
+        self._locks = {}  # type: Dict[str, _KeyLock]
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the session, returns `None` if it does not exist or has expired.
+        """
+        raise NotImplementedError
+
+    async def save(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Save the session.
+        """
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        """
+        Delete the session.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        Release the resources used by the store.
+        """
+        pass
+
+    def lock(self, key: str) -> _LockContext:
+        """
+        Return an async context manager which holds the lock of the key.
+        """
+        return _LockContext(self, key)
+
+    def session(self, key: str) -> _SessionContext:
+        """
+        Return an async context manager which locks and loads the session,
+        and saves it when leaving the context without an exception.
+        """
+        return _SessionContext(self, key)
+
+    def session_of(self, update: dikuto.BotoDikuto) -> _SessionContext:
+        """
+        `session` for the chat and the user of the update.
+        """
+        key = get_session_key(update)
+
+        if key is None:
+            raise exceptions.BotoEra(
+                "The update {} does not belong to any chat or user.".format(
+                    update.get("update_id")))
+
+        return self.session(key)
+
+    async def __aenter__(self) -> "BaseSessionStore":
+        return self
+
+    async def __aexit__(self, *args: Any, **kwargs: Any) -> None:
+        await self.close()
+
+
+class _MemoryEntry:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Dict[str, Any], expires_at: float) -> None:
+        self.value = value
+        self.expires_at = expires_at
+
+
+class MemorySessionStore(BaseSessionStore):
+    """
+    Session store that keeps sessions in the memory.
+
+    :arg max_size: The maximum number of sessions, the least recently used
+        sessions will be evicted when exceeded.
+    :arg ttl: The seconds a session is kept after it was last accessed.
+    """
+    def __init__(
+        self, *, max_size: Optional[int]=None,
+            ttl: Optional[float]=None) -> None:
+        super().__init__()
+
+        self._max_size = max_size
+        self._ttl = ttl
+
+        self._entries = collections.OrderedDict(
+            )  # type: collections.OrderedDict
+
+    def _purge(self, now: float) -> None:
+        entries = self._entries
+
+        if self._ttl is not None:
+            # Entries are ordered by the last access time,
+            # so the expired ones are always at the front.
+            while entries:
+                key = next(iter(entries))
+
+                if entries[key].expires_at > now:
+                    break
+
+                del entries[key]
+
+        if self._max_size is not None:
+            while len(entries) > self._max_size:
+                entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if self._ttl is not None:
+            now = time.monotonic()
+
+            if entry.expires_at <= now:
+                del self._entries[key]
+
+                return None
+
+            entry.expires_at = now + self._ttl
+
+        self._entries.move_to_end(key)
+
+        return entry.value
+
+    async def save(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        expires_at = now + self._ttl if self._ttl is not None else 0.0
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._entries[key] = _MemoryEntry(value, expires_at)
+
+        else:
+            entry.value = value
+            entry.expires_at = expires_at
+
+            self._entries.move_to_end(key)
+
+        self._purge(now)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SqliteSessionStore(BaseSessionStore):
+    """
+    Session store that keeps sessions in a sqlite database.
+
+    Sessions are serialized as json. Writes are collected and committed in
+    batches every `flush_interval` seconds, or as soon as `max_pending`
+    writes are pending. All the database operations are run in a dedicated
+    thread. Await `close` to flush the pending writes.
+
+    :arg path: The path of the database.
+    :arg ttl: The seconds a session is kept after it was last saved.
+    """
+    def __init__(
+        self, path: str, *, ttl: Optional[float]=None,
+        flush_interval: float=1.0, max_pending: int=1000,
+            loop: Optional[asyncio.AbstractEventLoop]=None) -> None:
+        super().__init__()
+
+        # The loop is resolved when used, so the store can be created before
+        # the loop that runs it.
+        self._loop = loop
+
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False)  # type: Optional[sqlite3.Connection]
+
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS botodesu_sessions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS botodesu_sessions_expires_at "
+                "ON botodesu_sessions (expires_at)")
+
+        # key -> (value, expires_at), value is `None` for deletion.
+        self._pending = {
+            }  # type: Dict[str, Tuple[Optional[str], Optional[float]]]
+        self._flush_handle = None  # type: Optional[asyncio.Handle]
+        self._flush_fur = None  # type: Optional[asyncio.Future]
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop or asyncio.get_event_loop()
+
+    def _run(self, func: Any, *args: Any) -> asyncio.Future:
+        return self._get_loop().run_in_executor(
+            self._executor, functools.partial(func, *args))
+
+    def _select(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        return self._conn.execute(
+            "SELECT value, expires_at FROM botodesu_sessions WHERE key = ?",
+            (key, )).fetchone()
+
+    def _write(
+        self, pending: Dict[str, Tuple[Optional[str], Optional[float]]],
+            now: float) -> None:
+        with self._conn:  # Commit all the writes in one transaction.
+            self._conn.execute(
+                "DELETE FROM botodesu_sessions WHERE expires_at <= ?",
+                (now, ))
+            self._conn.executemany(
+                "DELETE FROM botodesu_sessions WHERE key = ?",
+                [(key, ) for key, (value, _) in pending.items()
+                 if value is None])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO botodesu_sessions "
+                "(key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, value, expires_at)
+                 for key, (value, expires_at) in pending.items()
+                 if value is not None])
+
+    def _decode(
+        self, value: Optional[str],
+            expires_at: Optional[float]) -> Optional[Dict[str, Any]]:
+        if value is None:
+            return None
+
+        if expires_at is not None and expires_at <= time.time():
+            return None
+
+        return json.loads(value, object_pairs_hook=dikuto.BotoDikuto)
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        assert self._conn is not None, "The store is closed!"
+
+        if key in self._pending.keys():
+            return self._decode(*self._pending[key])
+
+        # The executor has only one thread, so the pending writes submitted
+        # earlier are always finished before the read.
+        row = await self._run(self._select, key)
+
+        return None if row is None else self._decode(*row)
+
+    def _add_pending(
+            self, key: str, value: Optional[str]) -> None:
+        assert self._conn is not None, "The store is closed!"
+
+        expires_at = time.time() + self._ttl if self._ttl is not None \
+            else None
+        self._pending[key] = (value, expires_at)
+
+        if len(self._pending) >= self._max_pending:
+            self._schedule_flush()
+
+        elif self._flush_handle is None:
+            self._flush_handle = self._get_loop().call_later(
+                self._flush_interval, self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        # The timer may have fired, it is set again when the running flush
+        # finishes with writes still pending.
+        self._flush_handle = None
+
+        if self._flush_fur is None or self._flush_fur.done():
+            self._flush_fur = asyncio.ensure_future(
+                self.flush(), loop=self._get_loop())
+            self._flush_fur.add_done_callback(self._on_flush_done)
+
+    def _on_flush_done(self, fur: asyncio.Future) -> None:
+        if self._conn is None or not self._pending:
+            return
+
+        if len(self._pending) >= self._max_pending:
+            self._schedule_flush()
+
+        elif self._flush_handle is None:
+            self._flush_handle = self._get_loop().call_later(
+                self._flush_interval, self._schedule_flush)
+
+    async def save(self, key: str, value: Dict[str, Any]) -> None:
+        self._add_pending(key, json.dumps(value))
+
+    async def delete(self, key: str) -> None:
+        self._add_pending(key, None)
+
+    async def flush(self) -> None:
+        """
+        Commit the pending writes.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+
+        try:
+            await self._run(self._write, pending, time.time())
+
+        except BaseException:
+            # Put back the writes unless they have been superseded.
+            for key, value in pending.items():
+                self._pending.setdefault(key, value)
+
+            raise
+
+    async def close(self) -> None:
+        if self._conn is None:
+            return
+
+        try:
+            if self._flush_fur is not None:
+                try:
+                    await self._flush_fur
+
+                finally:
+                    # The failed writes have been put back, retry them.
+                    await self.flush()
+
+            else:
+                await self.flush()
+
+        finally:
+            self._executor.shutdown()
+
+            self._conn.close()
+            self._conn = None
+
+
+class RedisSessionStore(BaseSessionStore):
+    """
+    Session store that keeps sessions in a Redis(or a server speaking
+    the same protocol) through TCP or a unix socket.
+
+    Sessions are serialized as json. Only `GET`, `SET` and `DEL` are used.
+
+    :arg path: The path of the unix socket, `host` and `port` are ignored
+        when provided.
+    :arg prefix: The prefix of the keys.
+    :arg ttl: The seconds a session is kept after it was last saved.
+    """
+    def __init__(
+        self, host: str="127.0.0.1", port: int=6379, *,
+        path: Optional[str]=None, prefix: str="botodesu:",
+        ttl: Optional[int]=None,
+            loop: Optional[asyncio.AbstractEventLoop]=None) -> None:
+        super().__init__()
+
+        self._loop = loop
+
+        self._host = host
+        self._port = port
+        self._path = path
+        self._prefix = prefix
+        self._ttl = ttl
+
+        self._reader = None  # type: Optional[asyncio.StreamReader]
+        self._writer = None  # type: Optional[asyncio.StreamWriter]
+
+        # The replies are read in the order of the commands. The lock is
+        # created when used so it is bound to the loop running the store.
+        self._conn_lock = None  # type: Optional[asyncio.Lock]
+
+    async def _connect(self) -> None:
+        if self._path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                self._path)
+
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                self._host, self._port)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+
+        line = await self._reader.readline()
+
+        if not line.endswith(b"\r\n"):
+            raise exceptions.BotoEra("The connection was closed.")
+
+        kind, rest = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return rest.decode()
+
+        elif kind == b"-":
+            # The reply has been read completely, the connection can be
+            # reused, so the error is raised by `execute`.
+            return exceptions.BotoEra(
+                "The server said: {}".format(rest.decode()))
+
+        elif kind == b":":
+            return int(rest)
+
+        elif kind == b"$":
+            length = int(rest)
+
+            if length < 0:
+                return None
+
+            return (await self._reader.readexactly(length + 2))[:-2]
+
+        elif kind == b"*":
+            length = int(rest)
+
+            if length < 0:
+                return None
+
+            replies = []  # type: List[Any]
+
+            for _ in range(length):
+                replies.append(await self._read_reply())
+
+            return replies
+
+        raise exceptions.BotoEra(
+            "Unknown reply from the server: {!r}".format(line))
+
+    async def execute(self, *args: Union[str, bytes, int]) -> Any:
+        """
+        Execute a command and return the reply.
+        """
+        chunks = [b"*", str(len(args)).encode(), b"\r\n"]
+
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+
+            chunks.extend(
+                (b"$", str(len(arg)).encode(), b"\r\n", arg, b"\r\n"))
+
+        if self._conn_lock is None:
+            self._conn_lock = asyncio.Lock()
+
+        async with self._conn_lock:
+            if self._writer is None:
+                await self._connect()
+
+            try:
+                self._writer.write(b"".join(chunks))
+
+                reply = await self._read_reply()
+
+            except BaseException:
+                # The connection is broken, or a reply may be left unread
+                # (e.g.: cancelled), which would be read by the next command.
+                self._writer.close()
+                self._reader = self._writer = None
+
+                raise
+
+        if isinstance(reply, exceptions.BotoEra):
+            raise reply
+
+        return reply
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.execute("GET", self._prefix + key)
+
+        if value is None:
+            return None
+
+        return json.loads(
+            value.decode(), object_pairs_hook=dikuto.BotoDikuto)
+
+    async def save(self, key: str, value: Dict[str, Any]) -> None:
+        args = [
+            "SET", self._prefix + key, json.dumps(value)]  # type: List[Any]
+
+        if self._ttl is not None:
+            args.extend(("EX", self._ttl))
+
+        await self.execute(*args)
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", self._prefix + key)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None